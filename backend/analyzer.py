@@ -13,11 +13,15 @@ Author: DNAiOS Team — Humanative AGI Systems
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List, Set, Tuple, Optional, Any
-from dataclasses import dataclass, field, asdict
-from zipfile import ZipFile
-from collections import defaultdict, deque
-import io, os, ast, re, json, posixpath, sys, sysconfig, importlib.util
+from fastapi.responses import StreamingResponse, JSONResponse, ORJSONResponse
+from starlette.background import BackgroundTask
+from typing import Dict, List, Set, Tuple, Optional, Any, BinaryIO, Iterator, Mapping, Sequence
+from dataclasses import dataclass, asdict, is_dataclass, replace
+from zipfile import ZipFile, ZipInfo
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import os, ast, re, json, posixpath, sys, hashlib
 import logging
 import math
 import gc
@@ -32,12 +36,20 @@ except ImportError:
 
 # Try to import radon
 try:
-    from radon.complexity import cc_visit
-    from radon.metrics import mi_visit
+    from radon.metrics import h_visit_ast, mi_compute
+    from radon.raw import analyze as raw_analyze
+    from radon.visitors import ComplexityVisitor
     RADON_AVAILABLE = True
 except ImportError:
     RADON_AVAILABLE = False
 
+# Try to import orjson for faster response encoding
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -55,6 +67,11 @@ if PSUTIL_AVAILABLE:
 else:
     logger.warning("✗ PSUtil not installed - install with: pip install psutil")
 
+if ORJSON_AVAILABLE:
+    logger.info("✓ orjson available - fast JSON encoding enabled")
+else:
+    logger.warning("✗ orjson not installed - install with: pip install orjson")
+
 # More aggressive garbage collection for large files
 gc.set_threshold(700, 10, 10)
 
@@ -65,26 +82,37 @@ gc.set_threshold(700, 10, 10)
 MAX_FILES = 100_000
 MAX_ZIP_SIZE = 4 * 1024 * 1024 * 1024  # 4 GB
 MAX_SINGLE_FILE_SIZE = 50 * 1024 * 1024  # 50 MB per file
+BINARY_SNIFF_SIZE = 1024  # leading bytes checked for NULs to spot binary files
 MEMORY_WARNING_THRESHOLD = 14000  # 14 GB - warn if exceeded
+ANALYSIS_CACHE_SIZE = 20_000  # per-module analyses kept across requests
+COMPLEXITY_CACHE_SIZE = 8192  # memoized per-source complexity results
+COMPLEXITY_CACHE_MIN_SIZE = 200  # smaller sources are cheaper to recompute than to hash
+PARALLEL_MIN_MODULES = 100  # below this, module analysis stays in-process
+PARALLEL_TASKS_PER_WORKER = 4  # chunks handed to each worker process
+PARALLEL_WINDOW = 1024  # sources decoded and in flight to the pool at once
 
 # Directories to automatically skip (common bloat)
 SKIP_DIRECTORIES = {
     'venv', 'env', '.venv', '.env', 'virtualenv',
     'node_modules', '.git', '.svn', '.hg',
     '__pycache__', '.pytest_cache', '.tox',
-    'build', 'dist', '.egg-info', 'eggs',
+    'build', 'dist', '*.egg-info', 'eggs',
     '.mypy_cache', '.ruff_cache', '.cache',
     'site-packages', 'lib/python*/site-packages'
 }
 
-STDLIB_FALLBACK = {
-    "sys", "os", "re", "json", "math", "time", "typing", "pathlib", "logging",
-    "itertools", "functools", "collections", "asyncio", "dataclasses", "enum",
-    "datetime", "random", "abc", "copy", "decimal", "fractions", "statistics",
-    "threading", "multiprocessing", "subprocess", "urllib", "http", "socket",
-    "ssl", "email", "html", "xml", "sqlite3", "csv", "pickle", "traceback",
-    "argparse", "configparser", "contextlib", "io", "struct", "weakref"
-}
+# Top-level standard library names of the running interpreter; typing_extensions
+# is the typing backport and is grouped with typing rather than shown as a package
+STDLIB_MODULES = frozenset(sys.stdlib_module_names) | {"typing_extensions"}
+
+# One alternation over SKIP_DIRECTORIES matching whole path components ('*' globs
+# within a component), so each path is checked with a single regex scan
+SKIP_PATTERN = re.compile(
+    r'(?:^|[\\/])(?:'
+    + '|'.join(re.escape(d).replace(r'\*', r'[^\\/]*') for d in sorted(SKIP_DIRECTORIES))
+    + r')(?:[\\/]|$)',
+    re.IGNORECASE
+)
 
 TAG_PATTERN = re.compile(
     r'#\s*@(?P<tag>agent|rsi|memory|haa|data|project)\s*(name\s*:\s*(?P<n>[\w\-\.\s]+))?',
@@ -122,50 +150,50 @@ def log_memory_usage() -> float:
 
 def should_skip_directory(path: str) -> bool:
     """Check if a directory path should be skipped"""
-    path_lower = path.lower()
-    path_parts = set(path.replace('\\', '/').split('/'))
-    
-    for skip_dir in SKIP_DIRECTORIES:
-        if skip_dir in path_parts or skip_dir in path_lower:
-            return True
-    
-    return False
+    return SKIP_PATTERN.search(path) is not None
 
 # ============================================================================
 # DATA MODELS
 # ============================================================================
 
-@dataclass
+EMPTY_TUPLE: Tuple[()] = ()  # shared default for empty, read-only sequences
+
+@dataclass(slots=True)
 class FunctionDetails:
     name: str
     docstring: str
     lineno: int
     complexity: int
-    calls: List[str] = field(default_factory=list)
-    called_by: List[str] = field(default_factory=list)
+    calls: Sequence[str] = EMPTY_TUPLE
+    called_by: Sequence[str] = EMPTY_TUPLE
     is_entrypoint: bool = False
 
-@dataclass
+def _format_x10(value: int) -> str:
+    """Render a fixed-point tenths value (e.g. 725) as "72.5" """
+    return f"{value // 10}.{value % 10}"
+
+@dataclass(slots=True, frozen=True)
 class ComplexityMetrics:
+    # Averages and MI are stored as integer tenths and only formatted in to_dict
     max_complexity: int = 0
-    avg_complexity: float = 0.0
-    maintainability_index: float = 0.0
+    avg_complexity_x10: int = 0
+    maintainability_index_x10: int = 0
     block_count: int = 0
     high_complexity_blocks: int = 0
     
     def to_dict(self) -> Dict[str, str]:
         d = {
             "MaxComplexity": str(self.max_complexity),
-            "MI": f"{self.maintainability_index:.1f}",
+            "MI": _format_x10(self.maintainability_index_x10),
             "Blocks": str(self.block_count)
         }
         if self.high_complexity_blocks > 0:
             d["HighComplexity"] = str(self.high_complexity_blocks)
-        if self.avg_complexity > 0:
-            d["AvgComplexity"] = f"{self.avg_complexity:.1f}"
+        if self.avg_complexity_x10 > 0:
+            d["AvgComplexity"] = _format_x10(self.avg_complexity_x10)
         return d
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NodeStats:
     lines: int
     classes: int = 0
@@ -185,7 +213,7 @@ class NodeStats:
             result.update(self.complexity.to_dict())
         return result
 
-@dataclass
+@dataclass(slots=True)
 class GraphNode:
     id: str
     kind: str
@@ -200,51 +228,151 @@ class GraphNode:
     y: float = 0.0
     parent: Optional[str] = None
 
-@dataclass
+class NodeTable:
+    """Graph nodes stored column-wise: one list per GraphNode field
+    
+    Symbol-level graphs hold hundreds of thousands of nodes; parallel lists
+    avoid an object per node, and rows are only turned into dicts (in
+    GraphNode field order) one at a time while the response is encoded.
+    """
+    
+    FIELDS = ("id", "kind", "type", "title", "path", "icon", "content",
+              "project", "stats", "x", "y", "parent")
+    __slots__ = FIELDS
+    
+    def __init__(self):
+        for name in self.FIELDS:
+            setattr(self, name, [])
+    
+    def append_row(self, id: str, kind: str, type: str, title: str, path: str,
+                   icon: str, content: str, project: str, stats: Dict[str, str],
+                   parent: Optional[str] = None) -> int:
+        """Add a node and return its row index"""
+        self.id.append(id)
+        # Small fixed vocabularies repeated on every node: share one string each
+        self.kind.append(sys.intern(kind))
+        self.type.append(sys.intern(type))
+        self.title.append(title)
+        self.path.append(path)
+        self.icon.append(sys.intern(icon))
+        self.content.append(content)
+        self.project.append(sys.intern(project))
+        self.stats.append(stats)
+        self.x.append(0.0)
+        self.y.append(0.0)
+        self.parent.append(parent)
+        return len(self.id) - 1
+    
+    def __len__(self) -> int:
+        return len(self.id)
+    
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        fields = self.FIELDS
+        for values in zip(*(getattr(self, name) for name in fields)):
+            yield dict(zip(fields, values))
+
+@dataclass(slots=True, frozen=True)
 class GraphEdge:
     source: str
     target: str
     type: str
 
+@dataclass(slots=True)
+class ParsedModule:
+    """A module's source parsed once and shared by every analysis pass"""
+    source: str
+    tree: ast.Module
+    lines: int
+
+def parse_module(code: str, lines: Optional[int] = None, filename: str = "<unknown>") -> ParsedModule:
+    """Parse source once; raises SyntaxError like ast.parse"""
+    if lines is None:
+        # Callers that read bytes pass the count taken before decoding
+        lines = code.count('\n') + 1
+    # What ast.parse does, minus its Python-level wrapper. No optimize level:
+    # newer Pythons then strip docstrings from the tree, which metadata needs.
+    tree = compile(code, filename, "exec", ast.PyCF_ONLY_AST, dont_inherit=True)
+    return ParsedModule(source=code, tree=tree, lines=lines)
+
 # ============================================================================
 # COMPLEXITY & AST VISITORS
 # ============================================================================
 
-def calculate_module_complexity(code: str, module_id: str = "") -> Tuple[ComplexityMetrics, List]:
-    if not RADON_AVAILABLE or not code.strip():
+_complexity_cache: "OrderedDict[bytes, Tuple[ComplexityMetrics, List]]" = OrderedDict()
+
+def _maintainability_index(code: str, tree: ast.AST, total_complexity: int) -> float:
+    """Equivalent of radon's mi_visit(code, multi=True) on an already-visited tree"""
+    raw = raw_analyze(code)
+    comments = (raw.comments + raw.multi) / float(raw.sloc) * 100 if raw.sloc else 0
+    return mi_compute(h_visit_ast(tree).total.volume, total_complexity, raw.lloc, comments)
+
+def _to_x10(value: float) -> int:
+    """Tenths of a float, rounded like round(value, 1) (correctly rounded decimal)"""
+    return round(round(value, 1) * 10)
+
+def calculate_module_complexity(parsed: ParsedModule) -> Tuple[ComplexityMetrics, List]:
+    """Complexity metrics and radon blocks, memoized on source content
+    
+    Large uploads often repeat files verbatim (vendored copies, fixtures,
+    boilerplate __init__.py) under different module ids, which ANALYSIS_CACHE
+    keeps apart, so results are also kept in a bounded LRU keyed on a digest
+    of the source alone.
+    """
+    code = parsed.source
+    if len(code) < COMPLEXITY_CACHE_MIN_SIZE:
+        return _calculate_module_complexity(parsed)
+    
+    key = hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest()
+    cached = _complexity_cache.get(key)
+    if cached is not None:
+        _complexity_cache.move_to_end(key)
+        return cached
+    
+    result = _calculate_module_complexity(parsed)
+    _complexity_cache[key] = result
+    if len(_complexity_cache) > COMPLEXITY_CACHE_SIZE:
+        _complexity_cache.popitem(last=False)
+    return result
+
+def _calculate_module_complexity(parsed: ParsedModule) -> Tuple[ComplexityMetrics, List]:
+    code = parsed.source
+    if not RADON_AVAILABLE or not code or code.isspace():
         return ComplexityMetrics(), []
     
     try:
-        blocks = cc_visit(code)
+        # One ComplexityVisitor walk yields both the per-block results and the
+        # module total that the maintainability index needs
+        cc = ComplexityVisitor.from_ast(parsed.tree)
+        blocks = cc.blocks
+        
+        try:
+            mi = float(_maintainability_index(code, parsed.tree, cc.total_complexity))
+        except:
+            mi = 100.0
         
         if not blocks:
-            try:
-                mi = float(mi_visit(code, multi=True))
-            except:
-                mi = 100.0
-            
             return ComplexityMetrics(
                 max_complexity=1,
-                avg_complexity=1.0,
-                maintainability_index=round(mi, 1),
+                avg_complexity_x10=10,
+                maintainability_index_x10=_to_x10(mi),
                 block_count=0,
                 high_complexity_blocks=0
             ), []
         
-        complexities = [b.complexity for b in blocks]
-        max_complexity = max(complexities)
-        avg_complexity = sum(complexities) / len(complexities)
-        high_count = sum(1 for c in complexities if c > 10)
-        
-        try:
-            mi = float(mi_visit(code, multi=True))
-        except:
-            mi = 100.0
+        # max, total and high-complexity count in one pass over the blocks
+        max_complexity = total_complexity = high_count = 0
+        for block in blocks:
+            c = block.complexity
+            total_complexity += c
+            if c > max_complexity:
+                max_complexity = c
+            if c > 10:
+                high_count += 1
         
         metrics = ComplexityMetrics(
             max_complexity=max_complexity,
-            avg_complexity=round(avg_complexity, 1),
-            maintainability_index=round(mi, 1),
+            avg_complexity_x10=_to_x10(total_complexity / len(blocks)),
+            maintainability_index_x10=_to_x10(mi),
             block_count=len(blocks),
             high_complexity_blocks=high_count
         )
@@ -265,16 +393,56 @@ def map_symbol_complexities(blocks) -> Dict[str, int]:
         mapping[key] = block.complexity
     return mapping
 
-class ImportVisitor(ast.NodeVisitor):
+ROUTE_DECORATORS = ("get", "post", "put", "delete", "patch", "route")
+
+# Node types that never have child nodes worth visiting (Load/Store contexts,
+# operators); the iterative walk does not push them at all
+_LEAF_NODES = (ast.expr_context, ast.boolop, ast.operator, ast.unaryop, ast.cmpop)
+
+# Stack marker: the function whose frame is on top of the visitor stack ends here
+_END_FUNCTION = object()
+
+class UnifiedVisitor(ast.NodeVisitor):
+    """Collects imports, call edges, entrypoints and top-level symbols in a
+    single traversal
+    
+    visit() walks the tree with an explicit stack and a per-type dispatch
+    table instead of NodeVisitor's recursive, name-formatting dispatch;
+    handlers therefore do not call generic_visit.
+    """
+    
     def __init__(self, parent_package: str):
         self.parent_package = parent_package
         self.imports: List[str] = []
-        self.calls: Set[str] = set()
+        # Duplicates within one module are rare, so these accumulate as plain
+        # lists and are de-duplicated once by the consumer
+        self.calls: List[str] = []
+        self.entrypoints: List[str] = []
+        # Call graph in compressed-sparse-row form: callers[i] calls the
+        # interned names callees[callee_offsets[i]:callee_offsets[i + 1]]
+        self.callers: List[str] = []
+        self.callee_offsets: List[int] = [0]
+        self.callees: List[str] = []
+        self._frames: List[Tuple[str, List[str]]] = []
+        # (name, "class" | "function", docstring, lineno) for module-level defs
+        self.symbols: List[Tuple[str, str, str, int]] = []
+        self._module_body: Set[int] = set()
+    
+    @property
+    def calls_set(self) -> Set[str]:
+        return set(self.calls)
+    
+    def call_graph(self) -> Dict[str, List[str]]:
+        """Callees per function name; same-named functions are merged"""
+        graph: Dict[str, Dict[str, None]] = {}
+        offsets, callees = self.callee_offsets, self.callees
+        for i, caller in enumerate(self.callers):
+            graph.setdefault(caller, {}).update(dict.fromkeys(callees[offsets[i]:offsets[i + 1]]))
+        return {caller: list(targets) for caller, targets in graph.items()}
     
     def visit_Import(self, node):
         for alias in node.names:
             self.imports.append(alias.name)
-        self.generic_visit(node)
     
     def visit_ImportFrom(self, node):
         if node.module:
@@ -302,46 +470,18 @@ class ImportVisitor(ast.NodeVisitor):
             else:
                 fq = abs_base + ("." + alias.name if abs_base else alias.name)
                 self.imports.append(fq if fq else alias.name)
-        
-        self.generic_visit(node)
     
     def visit_Call(self, node):
-        if isinstance(node.func, ast.Attribute):
-            if isinstance(node.func.value, ast.Name):
-                self.calls.add(node.func.value.id)
-        elif isinstance(node.func, ast.Name):
-            self.calls.add(node.func.id)
-        self.generic_visit(node)
-
-class CallGraphVisitor(ast.NodeVisitor):
-    def __init__(self):
-        self.calls: Dict[str, Set[str]] = defaultdict(set)
-        self.current_function: Optional[str] = None
-    
-    def visit_FunctionDef(self, node):
-        old_function = self.current_function
-        self.current_function = node.name
-        self.generic_visit(node)
-        self.current_function = old_function
-    
-    def visit_AsyncFunctionDef(self, node):
-        old_function = self.current_function
-        self.current_function = node.name
-        self.generic_visit(node)
-        self.current_function = old_function
-    
-    def visit_Call(self, node):
-        if self.current_function:
-            if isinstance(node.func, ast.Name):
-                self.calls[self.current_function].add(node.func.id)
-            elif isinstance(node.func, ast.Attribute):
-                if isinstance(node.func.value, ast.Name):
-                    self.calls[self.current_function].add(node.func.attr)
-        self.generic_visit(node)
-
-class EntrypointVisitor(ast.NodeVisitor):
-    def __init__(self):
-        self.entrypoints: Set[str] = set()
+        func = node.func
+        if isinstance(func, ast.Attribute):
+            if isinstance(func.value, ast.Name):
+                self.calls.append(func.value.id)
+                if self._frames:
+                    self._frames[-1][1].append(sys.intern(func.attr))
+        elif isinstance(func, ast.Name):
+            self.calls.append(func.id)
+            if self._frames:
+                self._frames[-1][1].append(sys.intern(func.id))
     
     def visit_If(self, node):
         if (isinstance(node.test, ast.Compare) and
@@ -350,59 +490,92 @@ class EntrypointVisitor(ast.NodeVisitor):
             any(isinstance(op, ast.Eq) for op in node.test.ops) and
             any(isinstance(c, ast.Constant) and c.value == "__main__" 
                 for c in node.test.comparators)):
-            self.entrypoints.add("__main__")
-        self.generic_visit(node)
+            self.entrypoints.append("__main__")
+    
+    def visit_ClassDef(self, node):
+        if id(node) in self._module_body:
+            doc = ast.get_docstring(node) or f"Class {node.name}"
+            self.symbols.append((node.name, "class", doc, node.lineno))
     
     def visit_FunctionDef(self, node):
+        if id(node) in self._module_body:
+            doc = ast.get_docstring(node) or f"Function {node.name}"
+            self.symbols.append((node.name, "function", doc, node.lineno))
+        
         for dec in node.decorator_list:
             if isinstance(dec, ast.Name) and dec.id in ("app", "route"):
-                self.entrypoints.add(node.name)
-            elif isinstance(dec, ast.Attribute) and dec.attr in ("get", "post", "put", "delete", "patch", "route"):
-                self.entrypoints.add(node.name)
+                self.entrypoints.append(node.name)
+            elif isinstance(dec, ast.Attribute) and dec.attr in ROUTE_DECORATORS:
+                self.entrypoints.append(node.name)
             elif isinstance(dec, ast.Call):
-                if isinstance(dec.func, ast.Attribute) and dec.func.attr in ("get", "post", "put", "delete", "patch", "route"):
-                    self.entrypoints.add(node.name)
-        self.generic_visit(node)
+                if isinstance(dec.func, ast.Attribute) and dec.func.attr in ROUTE_DECORATORS:
+                    self.entrypoints.append(node.name)
+        
+        self._frames.append((node.name, []))
     
-    def visit_AsyncFunctionDef(self, node):
-        for dec in node.decorator_list:
-            if isinstance(dec, ast.Name) and dec.id in ("app", "route"):
-                self.entrypoints.add(node.name)
-            elif isinstance(dec, ast.Attribute) and dec.attr in ("get", "post", "put", "delete", "patch", "route"):
-                self.entrypoints.add(node.name)
-            elif isinstance(dec, ast.Call):
-                if isinstance(dec.func, ast.Attribute) and dec.func.attr in ("get", "post", "put", "delete", "patch", "route"):
-                    self.entrypoints.add(node.name)
-        self.generic_visit(node)
-
-def extract_symbols(tree: ast.AST) -> List[Tuple[str, str, str, int]]:
-    symbols = []
-    for node in tree.body:
-        if isinstance(node, ast.ClassDef):
-            doc = ast.get_docstring(node) or f"Class {node.name}"
-            symbols.append((node.name, "class", doc, node.lineno))
-        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            doc = ast.get_docstring(node) or f"Function {node.name}"
-            symbols.append((node.name, "function", doc, node.lineno))
-    return symbols
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def _end_function(self):
+        name, called = self._frames.pop()
+        if called:
+            self.callers.append(name)
+            self.callees.extend(dict.fromkeys(called))
+            self.callee_offsets.append(len(self.callees))
+    
+    _VISITORS = {
+        ast.Import: visit_Import,
+        ast.ImportFrom: visit_ImportFrom,
+        ast.Call: visit_Call,
+        ast.If: visit_If,
+        ast.ClassDef: visit_ClassDef,
+        ast.FunctionDef: visit_FunctionDef,
+        ast.AsyncFunctionDef: visit_AsyncFunctionDef,
+    }
+    
+    def visit(self, tree):
+        self._module_body = {id(stmt) for stmt in getattr(tree, "body", ())}
+        visitors = self._VISITORS
+        stack = [tree]
+        pop, push = stack.pop, stack.append
+        
+        while stack:
+            node = pop()
+            if node is _END_FUNCTION:
+                self._end_function()
+                continue
+            
+            visitor = visitors.get(type(node))
+            if visitor is not None:
+                visitor(self, node)
+                if node.__class__ in (ast.FunctionDef, ast.AsyncFunctionDef):
+                    push(_END_FUNCTION)
+            
+            # Push children in reverse so they pop in source (pre-)order
+            for name in reversed(node._fields):
+                value = getattr(node, name, None)
+                if isinstance(value, list):
+                    for item in reversed(value):
+                        if isinstance(item, ast.AST) and not isinstance(item, _LEAF_NODES):
+                            push(item)
+                elif isinstance(value, ast.AST) and not isinstance(value, _LEAF_NODES):
+                    push(value)
 
 def is_stdlib(module_name: str) -> bool:
-    try:
-        if module_name in sys.builtin_module_names:
-            return True
-        spec = importlib.util.find_spec(module_name)
-        if not spec or not spec.origin:
-            return False
-        stdlib_paths = [sysconfig.get_paths().get('stdlib', ''), sys.base_prefix]
-        return any(spec.origin.startswith(p) for p in stdlib_paths if p)
-    except Exception:
-        return module_name in STDLIB_FALLBACK
+    # A name lookup, so packages installed next to the stdlib (venvs whose
+    # site-packages sit under sys.base_prefix) are no longer taken for it
+    return module_name in STDLIB_MODULES
 
 def get_top_module(full_name: str) -> str:
-    return full_name.split(".")[0] if full_name else ""
+    return full_name.partition(".")[0]
 
 def module_key_from_path(root: str, filepath: str) -> str:
-    rel_path = posixpath.relpath(filepath, root).rstrip("/")
+    # Roots are path prefixes of the files they own, so slicing replaces
+    # relpath; the prefix must end on a component boundary ('app' does not
+    # own 'application/util.py')
+    if root == "" or filepath.startswith(root + "/"):
+        rel_path = filepath[len(root):].strip("/")
+    else:
+        rel_path = posixpath.relpath(filepath, root).rstrip("/")
     parts = rel_path.split("/")
     
     if parts[-1] == "__init__.py":
@@ -410,10 +583,12 @@ def module_key_from_path(root: str, filepath: str) -> str:
     else:
         parts[-1] = os.path.splitext(parts[-1])[0]
     
-    return ".".join(p for p in parts if p and p != ".")
+    return sys.intern(".".join(p for p in parts if p and p != "."))
 
-def extract_metadata(code: str) -> Tuple[str, str, str]:
-    tag_match = TAG_PATTERN.search(code)
+def extract_metadata(code: str, tree: ast.AST) -> Tuple[str, str, str]:
+    # Every tag contains '@'; a C-level substring check skips the regex scan
+    # for the many files that have none
+    tag_match = TAG_PATTERN.search(code) if "@" in code else None
     
     if tag_match:
         tag_type = tag_match.group("tag").lower()
@@ -425,9 +600,8 @@ def extract_metadata(code: str) -> Tuple[str, str, str]:
         return tag_type, custom_name, ""
     
     try:
-        tree = ast.parse(code)
         docstring = ast.get_docstring(tree)
-        if docstring:
+        if docstring and docstring.strip():
             role = docstring.strip().splitlines()[0]
             return "data", "", role
     except:
@@ -435,16 +609,179 @@ def extract_metadata(code: str) -> Tuple[str, str, str]:
     
     return "data", "", "Module"
 
+# ============================================================================
+# PER-MODULE ANALYSIS
+# ============================================================================
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects affinity masks / container cpusets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+@dataclass(slots=True)
+class ModuleAnalysis:
+    """Everything learned from one module's source; picklable, holds no AST"""
+    module_id: str
+    filepath: str
+    mod_type: str
+    title: str
+    role: str
+    imports: List[str]
+    calls: Set[str]
+    symbols: List[Tuple[str, str, str, int]]
+    functions: List[FunctionDetails]
+    entrypoints: List[str]
+    call_graph: Dict[str, List[str]]
+    dead_functions: List[str]
+    stats: NodeStats
+    symbol_complexities: Dict[str, int]
+    complexity_ok: bool
+
+def analyze_module(module_id: str, filepath: str, code: str,
+                   lines: Optional[int] = None,
+                   compute_complexity: bool = True) -> Optional[ModuleAnalysis]:
+    """Parse and analyze one module; None if the source does not parse
+    
+    Top-level so it can run in a worker process. Import resolution needs the
+    whole module map and is left to the caller. Without compute_complexity
+    radon is skipped and stats carry no complexity metrics.
+    """
+    try:
+        parsed = parse_module(code, lines, filepath)
+    except SyntaxError:
+        return None
+    tree = parsed.tree
+    
+    if compute_complexity:
+        complexity, blocks = calculate_module_complexity(parsed)
+        symbol_complexities = map_symbol_complexities(blocks)
+    else:
+        # No metrics at all rather than zeroed ones, so none are reported
+        complexity, symbol_complexities = None, {}
+    
+    mod_type, title, role = extract_metadata(code, tree)
+    if not title:
+        title = module_id.split(".")[-1]
+    if not role:
+        role = "Module"
+    
+    parent_pkg = ".".join(module_id.split(".")[:-1])
+    visitor = UnifiedVisitor(parent_pkg)
+    visitor.visit(tree)
+    call_graph = visitor.call_graph()
+    entrypoints = dict.fromkeys(visitor.entrypoints)
+    
+    symbols = visitor.symbols
+    
+    # Invert the call graph once; functions nobody calls share EMPTY_TUPLE
+    called_by = defaultdict(list)
+    for f, targets in call_graph.items():
+        for t in targets:
+            called_by[t].append(f)
+    
+    # Function details only read the call graph lists, so they share them
+    functions = []
+    for sym_name, sym_kind, sym_doc, lineno in symbols:
+        if sym_kind == "function":
+            functions.append(FunctionDetails(
+                name=sym_name,
+                docstring=sym_doc,
+                lineno=lineno,
+                complexity=symbol_complexities.get(sym_name, 0),
+                calls=call_graph.get(sym_name, EMPTY_TUPLE),
+                called_by=called_by.get(sym_name, EMPTY_TUPLE),
+                is_entrypoint=sym_name in entrypoints
+            ))
+    
+    all_called = called_by.keys()
+    dead = [f.name for f in functions if f.name not in all_called and not f.is_entrypoint]
+    
+    stats = NodeStats(
+        lines=parsed.lines,
+        classes=sum(1 for _, k, _, _ in symbols if k == "class"),
+        functions=sum(1 for _, k, _, _ in symbols if k == "function"),
+        imports=len(visitor.imports),
+        complexity=complexity
+    )
+    
+    return ModuleAnalysis(
+        module_id=module_id,
+        filepath=filepath,
+        mod_type=mod_type,
+        title=title,
+        role=role,
+        imports=visitor.imports,
+        calls=visitor.calls_set,
+        symbols=symbols,
+        functions=functions,
+        entrypoints=list(entrypoints),
+        call_graph=call_graph,
+        dead_functions=dead,
+        stats=stats,
+        symbol_complexities=symbol_complexities,
+        complexity_ok=complexity is not None and (complexity.block_count > 0 or complexity.max_complexity > 0)
+    )
+
+# Analyses from earlier requests, keyed on a digest of everything the
+# analysis itself depends on. Re-uploads of a project mostly repeat files
+# verbatim, and those skip parsing, complexity and visiting entirely.
+# The module id is part of the key (relative imports and the title depend on
+# it), so identical files at different paths still share only the
+# content-keyed complexity memo above.
+# Entries are never mutated once stored; None records a syntax error.
+ANALYSIS_CACHE: "OrderedDict[bytes, Optional[ModuleAnalysis]]" = OrderedDict()
+_CACHE_MISS = object()
+
+def analysis_cache_key(module_id: str, code: str, compute_complexity: bool = True) -> bytes:
+    # The file path is left out: it only labels the result, and archives of
+    # the same project often differ in their top folder (repo-main/ vs
+    # repo-<sha>/) while module ids stay the same
+    h = hashlib.sha256(f"{module_id}\0{compute_complexity:d}\0".encode("utf-8"))
+    h.update(code.encode("utf-8"))
+    return h.digest()
+
+def _cache_get(key: bytes, filepath: str) -> Any:
+    """Cached analysis for key relabelled with filepath, or _CACHE_MISS"""
+    analysis = ANALYSIS_CACHE.get(key, _CACHE_MISS)
+    if analysis is _CACHE_MISS:
+        return analysis
+    if analysis is not None and analysis.filepath != filepath:
+        # Shallow copy: the shared fields are never mutated
+        analysis = replace(analysis, filepath=filepath)
+        ANALYSIS_CACHE[key] = analysis
+    ANALYSIS_CACHE.move_to_end(key)
+    return analysis
+
+def _cache_put(key: bytes, analysis: Optional[ModuleAnalysis]):
+    ANALYSIS_CACHE[key] = analysis
+    if len(ANALYSIS_CACHE) > ANALYSIS_CACHE_SIZE:
+        ANALYSIS_CACHE.popitem(last=False)
+
 # ============================================================================
 # GRAPH BUILDER
 # ============================================================================
 
+def unit_circle(count: int) -> Tuple[List[float], List[float]]:
+    """Cosines and sines of count evenly spaced angles, starting at 0°
+    
+    Layout rings only need scaling by their radius; each angle is converted
+    to radians once for both tables.
+    """
+    step = 360 / max(1, count)
+    radians = list(map(math.radians, [i * step for i in range(count)]))
+    return list(map(math.cos, radians)), list(map(math.sin, radians))
+
 class DependencyGraphBuilder:
-    def __init__(self, files: Dict[str, str], folder_structure: Dict, symbol_level: bool = False):
+    def __init__(self, files: Dict[str, str], folder_structure: Dict, symbol_level: bool = False,
+                 line_counts: Optional[Dict[str, int]] = None, compute_complexity: bool = True):
         self.files = files
+        # Not `or {}`: a ZipSourceMap's counts start empty and fill as sources are read
+        self.line_counts = line_counts if line_counts is not None else {}
         self.folder_structure = folder_structure
         self.symbol_level = symbol_level
-        self.nodes: List[GraphNode] = []
+        self.compute_complexity = compute_complexity
+        self.nodes = NodeTable()
         self.edges: Set[Tuple[str, str, str]] = set()
         self.module_map: Dict[str, str] = {}
         self.external_deps: Set[str] = set()
@@ -477,19 +814,21 @@ class DependencyGraphBuilder:
         return {
             "version": "4.9-optimized",
             "generatedAt": datetime.now().isoformat(),
-            "nodes": [asdict(n) for n in self.nodes],
-            "edges": [{"from": a, "to": b, "type": t} for a, b, t in sorted(self.edges)],
+            # Nodes and edges are encoded one at a time by iter_graph_json
+            "nodes": self.nodes.iter_dicts(),
+            "edges": ({"from": a, "to": b, "type": t} for a, b, t in sorted(self.edges)),
             "module_details": self.module_details,
             "folder_structure": self.folder_structure,
             "file_contents": self.files,
             "layout_depth": self.layout_depth,
             "metadata": {
                 "total_files": len(self.files),
-                "total_modules": sum(1 for n in self.nodes if n.kind == "module"),
-                "total_symbols": sum(1 for n in self.nodes if n.kind in ["class", "function"]),
-                "total_external": sum(1 for n in self.nodes if n.kind == "external"),
+                "total_modules": self.nodes.kind.count("module"),
+                "total_symbols": self.nodes.kind.count("class") + self.nodes.kind.count("function"),
+                "total_external": self.nodes.kind.count("external"),
                 "total_edges": len(self.edges),
                 "symbol_level": self.symbol_level,
+                "complexity": self.compute_complexity,
                 "radon_available": RADON_AVAILABLE,
                 "file_contents_included": True,
                 "memory_optimized": True
@@ -516,27 +855,35 @@ class DependencyGraphBuilder:
                     mod_id = module_key_from_path(root, filepath)
                     self.module_map[mod_id] = filepath
                     break
+        
+        # Resolution indexes, built once: the first module (in module_map
+        # order) ending in each dotted suffix, and per last name segment
+        self._by_suffix: Dict[str, str] = {}
+        self._by_basename: Dict[str, str] = {}
+        for mod_id in self.module_map:
+            parts = mod_id.split(".")
+            for i in range(1, len(parts)):
+                self._by_suffix.setdefault(sys.intern(".".join(parts[i:])), mod_id)
+            self._by_basename.setdefault(sys.intern(parts[-1]), mod_id)
+        
+        # module_map is fixed from here on, so each import name only needs
+        # resolving once; the stats count distinct names, not occurrences
+        self._resolve_import = lru_cache(maxsize=None)(self._resolve_import_uncached)
     
-    def _resolve_import(self, import_name: str) -> Optional[str]:
+    def _resolve_import_uncached(self, import_name: str) -> Optional[str]:
         if import_name in self.module_map:
             self.import_resolution_stats["exact"] += 1
             return import_name
         
-        for key in self.module_map:
-            if key.endswith('.' + import_name):
-                self.import_resolution_stats["fuzzy"] += 1
-                return key
+        key = self._by_suffix.get(import_name)
+        if key is not None:
+            self.import_resolution_stats["fuzzy"] += 1
+            return key
         
-        import_basename = import_name.split('.')[-1]
-        for key in self.module_map:
-            if key.split('.')[-1] == import_basename:
-                self.import_resolution_stats["basename"] += 1
-                return key
-        
-        for key in self.module_map:
-            if import_name in key:
-                self.import_resolution_stats["fuzzy"] += 1
-                return key
+        key = self._by_basename.get(import_name.rpartition('.')[2])
+        if key is not None:
+            self.import_resolution_stats["basename"] += 1
+            return key
         
         top = get_top_module(import_name)
         if top in self.module_map:
@@ -550,160 +897,204 @@ class DependencyGraphBuilder:
         total = len(self.module_map)
         processed = 0
         
-        for module_id, filepath in self.module_map.items():
-            code = self.files[filepath]
-            
-            try:
-                tree = ast.parse(code)
-            except SyntaxError:
-                self.complexity_failed += 1
-                continue
-            
-            complexity, blocks = calculate_module_complexity(code, module_id)
-            if complexity.block_count > 0 or complexity.max_complexity > 0:
-                self.complexity_calculated += 1
-            else:
-                self.complexity_failed += 1
-            
-            mod_type, title, role = extract_metadata(code)
-            if not title:
-                title = module_id.split(".")[-1]
-            if not role:
-                role = "Module"
-            
-            parent_pkg = ".".join(module_id.split(".")[:-1])
-            visitor = ImportVisitor(parent_pkg)
-            visitor.visit(tree)
-            
-            call_visitor = CallGraphVisitor()
-            call_visitor.visit(tree)
-            
-            entry_visitor = EntrypointVisitor()
-            entry_visitor.visit(tree)
-            
-            symbols = extract_symbols(tree)
-            symbol_complexities = map_symbol_complexities(blocks)
-            
-            functions = []
-            for sym_name, sym_kind, sym_doc, lineno in symbols:
-                if sym_kind == "function":
-                    complexity_val = symbol_complexities.get(sym_name, 0)
-                    functions.append(FunctionDetails(
-                        name=sym_name,
-                        docstring=sym_doc,
-                        lineno=lineno,
-                        complexity=complexity_val,
-                        calls=list(call_visitor.calls.get(sym_name, [])),
-                        is_entrypoint=sym_name in entry_visitor.entrypoints
-                    ))
-            
-            called_by = defaultdict(list)
-            for f, targets in call_visitor.calls.items():
-                for t in targets:
-                    called_by[t].append(f)
-            for func in functions:
-                func.called_by = called_by.get(func.name, [])
-            
-            all_called = set(c for targets in call_visitor.calls.values() for c in targets)
-            dead = [f.name for f in functions if f.name not in all_called and not f.is_entrypoint]
-            
-            stats = NodeStats(
-                lines=code.count('\n') + 1,
-                classes=sum(1 for _, k, _, _ in symbols if k == "class"),
-                functions=sum(1 for _, k, _, _ in symbols if k == "function"),
-                imports=len(visitor.imports),
-                complexity=complexity
-            )
-            
-            node = GraphNode(
-                id=module_id,
-                kind="module",
-                type=mod_type,
-                title=title,
-                path=filepath,
-                icon=TYPE_ICONS.get(mod_type, "💾"),
-                content=role,
-                project=get_top_module(module_id),
-                stats=stats.to_dict()
-            )
-            self.nodes.append(node)
-            
-            self.module_details[module_id] = {
-                "path": filepath,
-                "type": mod_type,
-                "role": role,
-                "imports": visitor.imports,
-                "symbols": len(symbols),
-                "stats": stats.to_dict(),
-                "functions": [asdict(f) for f in functions],
-                "entrypoints": list(entry_visitor.entrypoints),
-                "call_graph": {k: list(v) for k, v in call_visitor.calls.items()},
-                "dead_functions": dead
-            }
-            
-            for imp in visitor.imports:
-                target = self._resolve_import(imp)
-                top_level = get_top_module(imp)
+        # The loop only allocates (ASTs, analyses, nodes), so automatic
+        # collections would repeatedly traverse a growing heap for little
+        # gain; collect once at the end instead. Objects that already exist
+        # (sources, module_map) are frozen so that collection skips them.
+        gc.freeze()
+        gc.disable()
+        try:
+            for analysis in self._iter_module_analyses():
+                if analysis is None:
+                    self.complexity_failed += 1
+                    continue
                 
-                if target and target != module_id:
-                    self.edges.add((module_id, target, "imports"))
-                elif not is_stdlib(top_level):
-                    self.external_deps.add(top_level)
-            
-            for call_alias in visitor.calls:
-                for imp in visitor.imports:
-                    if call_alias == imp.split(".")[-1]:
-                        target = self._resolve_import(imp)
-                        if target and target != module_id:
-                            self.edges.add((module_id, target, "calls"))
-                            break
-            
-            if self.symbol_level and blocks:
-                for sym_name, sym_kind, sym_doc, lineno in symbols:
-                    sym_id = f"{module_id}.{sym_name}"
-                    sym_complexity_value = symbol_complexities.get(sym_name, 0)
-                    
-                    if sym_complexity_value > 0:
-                        sym_complexity = ComplexityMetrics(
-                            max_complexity=sym_complexity_value,
-                            avg_complexity=float(sym_complexity_value),
-                            maintainability_index=complexity.maintainability_index,
-                            block_count=1,
-                            high_complexity_blocks=1 if sym_complexity_value > 10 else 0
-                        )
+                if self.compute_complexity:
+                    if analysis.complexity_ok:
+                        self.complexity_calculated += 1
                     else:
-                        sym_complexity = None
-                    
-                    sym_stats = NodeStats(lines=0, complexity=sym_complexity)
+                        self.complexity_failed += 1
+                
+                self._add_module(analysis)
+                
+                processed += 1
+                if processed % 500 == 0:
+                    mem_mb = log_memory_usage()
+                    logger.info(f"Progress: {processed}/{total} modules processed")
                     
-                    sym_node = GraphNode(
-                        id=sym_id,
-                        kind=sym_kind,
-                        type=mod_type,
-                        title=sym_name,
-                        path=filepath,
-                        icon=TYPE_ICONS.get(sym_kind, "⚙️"),
-                        content=sym_doc.splitlines()[0] if sym_doc else sym_name,
-                        project=get_top_module(module_id),
-                        stats=sym_stats.to_dict(),
-                        parent=module_id
+                    if mem_mb > MEMORY_WARNING_THRESHOLD:
+                        logger.warning(f"⚠️ Memory usage high: {mem_mb:.1f} MB")
+        finally:
+            gc.enable()
+            gc.collect()
+            gc.unfreeze()
+    
+    def _iter_module_analyses(self) -> Iterator[Optional["ModuleAnalysis"]]:
+        """Analysis for every module, in module_map order
+        
+        Results come from ANALYSIS_CACHE where possible. Parsing and visiting
+        are pure CPU work, so when enough modules miss the cache they are
+        fanned out to worker processes; a few misses are analyzed inline to
+        avoid pool startup.
+        """
+        total = len(self.module_map)
+        
+        # Cache hits are taken up front so later insertions cannot evict them.
+        # Sources are only hashed here; misses are read again when analyzed so
+        # at most one source (inline) or one PARALLEL_WINDOW (pool) of decoded
+        # sources is alive at once.
+        results: List[Any] = []
+        misses: List[Tuple[int, bytes, str, str]] = []
+        for module_id, filepath in self.module_map.items():
+            key = analysis_cache_key(module_id, self.files[filepath], self.compute_complexity)
+            analysis = _cache_get(key, filepath)
+            if analysis is _CACHE_MISS:
+                misses.append((len(results), key, module_id, filepath))
+            results.append(analysis)
+        
+        if len(misses) < total:
+            logger.info(f"♻️ Reusing {total - len(misses)} cached module analyses")
+        
+        workers = available_cpus()
+        if len(misses) < PARALLEL_MIN_MODULES or workers < 2:
+            # Misses are in module order, so each is analyzed as it comes up
+            pending = iter(misses)
+            for analysis in results:
+                if analysis is _CACHE_MISS:
+                    _, key, module_id, filepath = next(pending)
+                    code = self.files[filepath]
+                    analysis = analyze_module(
+                        module_id, filepath, code, self.line_counts.get(filepath),
+                        self.compute_complexity
                     )
-                    self.nodes.append(sym_node)
-                    self.edges.add((module_id, sym_id, "defines"))
+                    _cache_put(key, analysis)
+                yield analysis
+            return
+        
+        logger.info(f"⚙️ Analyzing {len(misses)} modules on {workers} processes")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(misses), PARALLEL_WINDOW):
+                window = misses[start:start + PARALLEL_WINDOW]
+                module_ids = [m[2] for m in window]
+                filepaths = [m[3] for m in window]
+                codes = [self.files[f] for f in filepaths]
+                lines = [self.line_counts.get(f) for f in filepaths]
+                flags = [self.compute_complexity] * len(codes)
+                # A few chunks per worker keeps pickling overhead low while
+                # still letting fast workers pick up the tail
+                chunksize = max(1, len(codes) // (workers * PARALLEL_TASKS_PER_WORKER))
+                analyses = executor.map(
+                    analyze_module, module_ids, filepaths, codes, lines, flags,
+                    chunksize=chunksize
+                )
+                for (position, key, _, _), analysis in zip(window, analyses):
+                    _cache_put(key, analysis)
+                    results[position] = analysis
+        
+        yield from results
+    
+    def _add_module(self, analysis: "ModuleAnalysis"):
+        """Merge one module's analysis into the graph (main process only)"""
+        # Results arrive unpickled from workers as fresh strings. The module id
+        # is repeated in node ids, edge tuples and detail/depth keys, and
+        # import names repeat across most modules, so intern both
+        module_id = sys.intern(analysis.module_id)
+        filepath = analysis.filepath
+        mod_type = analysis.mod_type
+        imports = [sys.intern(imp) for imp in analysis.imports]
+        stats_dict = analysis.stats.to_dict()
+        
+        self.nodes.append_row(
+            id=module_id,
+            kind="module",
+            type=mod_type,
+            title=analysis.title,
+            path=filepath,
+            icon=TYPE_ICONS.get(mod_type, "💾"),
+            content=analysis.role,
+            project=get_top_module(module_id),
+            stats=stats_dict
+        )
+        
+        self.module_details[module_id] = {
+            "path": filepath,
+            "type": mod_type,
+            "role": analysis.role,
+            "imports": imports,
+            "symbols": len(analysis.symbols),
+            "stats": stats_dict,
+            "functions": analysis.functions,
+            "entrypoints": analysis.entrypoints,
+            "call_graph": analysis.call_graph,
+            "dead_functions": analysis.dead_functions
+        }
+        
+        # Targets are deduplicated per module in small local sets and merged
+        # into self.edges once, instead of a 3-tuple hash per candidate edge
+        import_targets: Set[str] = set()
+        by_alias: Dict[str, List[str]] = defaultdict(list)
+        for imp in imports:
+            target = self._resolve_import(imp)
+            top_level = get_top_module(imp)
+            by_alias[imp.rpartition(".")[2]].append(imp)
             
-            processed += 1
-            if processed % 500 == 0:
-                gc.collect()
-                mem_mb = log_memory_usage()
-                logger.info(f"Progress: {processed}/{total} modules processed")
+            if target and target != module_id:
+                import_targets.add(target)
+            elif not is_stdlib(top_level):
+                self.external_deps.add(top_level)
+        
+        # A call links to the first import bound to its name that resolves
+        call_targets: Set[str] = set()
+        for call_alias in analysis.calls:
+            for imp in by_alias.get(call_alias, ()):
+                target = self._resolve_import(imp)
+                if target and target != module_id:
+                    call_targets.add(target)
+                    break
+        
+        self.edges.update([(module_id, t, "imports") for t in import_targets])
+        self.edges.update([(module_id, t, "calls") for t in call_targets])
+        
+        # Symbols are listed for modules radon found blocks in; with complexity
+        # off there are no blocks, so every module's symbols are listed
+        if self.symbol_level and (analysis.symbol_complexities or not self.compute_complexity):
+            complexity = analysis.stats.complexity
+            for sym_name, sym_kind, sym_doc, lineno in analysis.symbols:
+                sym_id = f"{module_id}.{sym_name}"
+                sym_complexity_value = analysis.symbol_complexities.get(sym_name, 0)
+                
+                if sym_complexity_value > 0:
+                    sym_complexity = ComplexityMetrics(
+                        max_complexity=sym_complexity_value,
+                        avg_complexity_x10=sym_complexity_value * 10,
+                        maintainability_index_x10=complexity.maintainability_index_x10,
+                        block_count=1,
+                        high_complexity_blocks=1 if sym_complexity_value > 10 else 0
+                    )
+                else:
+                    sym_complexity = None
+                
+                sym_stats = NodeStats(lines=0, complexity=sym_complexity)
                 
-                if mem_mb > MEMORY_WARNING_THRESHOLD:
-                    logger.warning(f"⚠️ Memory usage high: {mem_mb:.1f} MB")
+                self.nodes.append_row(
+                    id=sym_id,
+                    kind=sym_kind,
+                    type=mod_type,
+                    title=sym_name,
+                    path=filepath,
+                    icon=TYPE_ICONS.get(sym_kind, "⚙️"),
+                    content=sym_doc.splitlines()[0] if sym_doc else sym_name,
+                    project=get_top_module(module_id),
+                    stats=sym_stats.to_dict(),
+                    parent=module_id
+                )
+                self.edges.add((module_id, sym_id, "defines"))
     
     def _add_external_nodes(self):
         for ext_pkg in sorted(self.external_deps):
-            ext_node = GraphNode(
-                id=f"external:{ext_pkg}",
+            ext_id = sys.intern(f"external:{ext_pkg}")
+            self.nodes.append_row(
+                id=ext_id,
                 kind="external",
                 type="external",
                 title=ext_pkg,
@@ -713,129 +1104,218 @@ class DependencyGraphBuilder:
                 project="external",
                 stats={"Type": "External Package"}
             )
-            self.nodes.append(ext_node)
             
             for module_id, details in self.module_details.items():
                 for imp in details["imports"]:
                     if get_top_module(imp) == ext_pkg:
-                        self.edges.add((module_id, f"external:{ext_pkg}", "external"))
+                        self.edges.add((module_id, ext_id, "external"))
                         break
     
     def _calculate_layout(self):
+        nodes = self.nodes
+        xs, ys = nodes.x, nodes.y
+        
         if not self.edges:
-            angle = 0
-            step = 360 / max(1, len(self.nodes))
             radius = 500
-            
-            for node in self.nodes:
-                node.x = radius * math.cos(math.radians(angle))
-                node.y = radius * math.sin(math.radians(angle))
-                angle += step
+            cosines, sines = unit_circle(len(nodes))
+            xs[:] = [radius * c for c in cosines]
+            ys[:] = [radius * s for s in sines]
             return
         
-        graph = defaultdict(set)
-        reverse_graph = defaultdict(set)
-        all_nodes = set(n.id for n in self.nodes if n.kind in ["module", "external"])
+        # Module/external nodes are numbered once; adjacency, components and
+        # depths are then flat int lists indexed by that number
+        layout_ids = [
+            node_id for node_id, kind in zip(nodes.id, nodes.kind)
+            if kind in ("module", "external")
+        ]
+        index = {node_id: i for i, node_id in enumerate(layout_ids)}
+        count = len(layout_ids)
+        graph: List[List[int]] = [[] for _ in range(count)]
+        reverse_graph: List[List[int]] = [[] for _ in range(count)]
         
         for src, dst, edge_type in self.edges:
-            if edge_type in ["imports", "calls", "external"]:
-                if src in all_nodes and dst in all_nodes:
-                    graph[src].add(dst)
-                    reverse_graph[dst].add(src)
+            if edge_type in ("imports", "calls", "external"):
+                s = index.get(src)
+                d = index.get(dst)
+                if s is not None and d is not None:
+                    graph[s].append(d)
+                    reverse_graph[d].append(s)
         
-        visited = set()
+        # Kosaraju with explicit stacks: deep import chains would otherwise
+        # run into the interpreter's recursion limit. The first pass keeps
+        # each node's neighbour iterator on the stack to get a postorder.
+        visited = bytearray(count)
         order = []
         
-        def dfs1(node):
-            visited.add(node)
-            for neighbor in graph[node]:
-                if neighbor not in visited:
-                    dfs1(neighbor)
-            order.append(node)
-        
-        for node in all_nodes:
-            if node not in visited:
-                dfs1(node)
+        for start in range(count):
+            if visited[start]:
+                continue
+            visited[start] = 1
+            stack = [(start, iter(graph[start]))]
+            while stack:
+                node, neighbors = stack[-1]
+                for neighbor in neighbors:
+                    if not visited[neighbor]:
+                        visited[neighbor] = 1
+                        stack.append((neighbor, iter(graph[neighbor])))
+                        break
+                else:
+                    stack.pop()
+                    order.append(node)
         
-        component = {}
+        component = [0] * count
         comp_id = 0
-        visited.clear()
-        
-        def dfs2(node, cid):
-            component[node] = cid
-            visited.add(node)
-            for neighbor in reverse_graph[node]:
-                if neighbor not in visited:
-                    dfs2(neighbor, cid)
-        
-        for node in reversed(order):
-            if node not in visited:
-                dfs2(node, comp_id)
-                comp_id += 1
-        
-        comp_graph = defaultdict(set)
-        for src, dst, _ in self.edges:
-            if src in component and dst in component:
-                if component[src] != component[dst]:
-                    comp_graph[component[src]].add(component[dst])
+        visited = bytearray(count)
         
-        comp_depth = {i: 0 for i in range(comp_id)}
-        in_degree = defaultdict(int)
+        for start in reversed(order):
+            if visited[start]:
+                continue
+            visited[start] = 1
+            stack = [start]
+            while stack:
+                node = stack.pop()
+                component[node] = comp_id
+                for neighbor in reverse_graph[node]:
+                    if not visited[neighbor]:
+                        visited[neighbor] = 1
+                        stack.append(neighbor)
+            comp_id += 1
         
-        for src in comp_graph:
-            for dst in comp_graph[src]:
-                in_degree[dst] += 1
+        # Longest-path depth over the condensation DAG (Kahn's algorithm with a
+        # list as the queue); parallel edges are harmless, each is counted and
+        # released exactly once
+        comp_graph: List[List[int]] = [[] for _ in range(comp_id)]
+        in_degree = [0] * comp_id
+        for s in range(count):
+            cs = component[s]
+            for d in graph[s]:
+                cd = component[d]
+                if cs != cd:
+                    comp_graph[cs].append(cd)
+                    in_degree[cd] += 1
         
-        queue = deque([c for c in range(comp_id) if in_degree[c] == 0])
+        comp_depth = [0] * comp_id
+        queue = [c for c in range(comp_id) if in_degree[c] == 0]
+        head = 0
         
-        while queue:
-            c = queue.popleft()
+        while head < len(queue):
+            c = queue[head]
+            head += 1
+            next_depth = comp_depth[c] + 1
             for neighbor in comp_graph[c]:
-                comp_depth[neighbor] = max(comp_depth[neighbor], comp_depth[c] + 1)
+                if comp_depth[neighbor] < next_depth:
+                    comp_depth[neighbor] = next_depth
                 in_degree[neighbor] -= 1
                 if in_degree[neighbor] == 0:
                     queue.append(neighbor)
         
-        depth_nodes = defaultdict(list)
+        # Depth of every module/external node, resolved through its component
+        # once; symbols then take their parent's depth in a single lookup
+        node_depth = dict(zip(layout_ids, [comp_depth[c] for c in component]))
+        
+        # Node table rows per depth ring
+        depth_rows = defaultdict(list)
         
-        for node in self.nodes:
-            if node.kind in ["module", "external"]:
-                depth = comp_depth.get(component.get(node.id, 0), 0)
-                depth_nodes[depth].append(node)
-                self.layout_depth[node.id] = depth
-            elif node.parent:
-                parent_depth = comp_depth.get(component.get(node.parent, 0), 0)
-                depth_nodes[parent_depth].append(node)
-                self.layout_depth[node.id] = parent_depth
+        for row, (node_id, kind, parent) in enumerate(zip(nodes.id, nodes.kind, nodes.parent)):
+            if kind in ("module", "external"):
+                depth = node_depth[node_id]
+            elif parent:
+                depth = node_depth.get(parent, 0)
+            else:
+                continue
+            depth_rows[depth].append(row)
+            self.layout_depth[node_id] = depth
         
-        for depth, nodes_at_depth in depth_nodes.items():
+        for depth, rows_at_depth in depth_rows.items():
             radius = 300 + depth * 200
-            angle_step = 360 / max(1, len(nodes_at_depth))
+            cosines, sines = unit_circle(len(rows_at_depth))
             
-            for i, node in enumerate(nodes_at_depth):
-                angle = i * angle_step
-                node.x = radius * math.cos(math.radians(angle))
-                node.y = radius * math.sin(math.radians(angle))
+            for row, c, s in zip(rows_at_depth, cosines, sines):
+                xs[row] = radius * c
+                ys[row] = radius * s
 
 # ============================================================================
 # FILE HANDLING
 # ============================================================================
 
-def extract_python_files(zip_bytes: bytes) -> Tuple[Dict[str, str], Dict]:
+class ZipSourceMap(Mapping[str, str]):
+    """Read-only {path: source} view over the .py entries of an open ZipFile
+    
+    Sources are decompressed and decoded on access instead of being kept in
+    memory for the whole request; line counts are recorded from the raw
+    bytes as entries are read. The owner must call close() when done.
+    """
+    
+    def __init__(self, zf: ZipFile, fh: BinaryIO):
+        self._zf = zf
+        self._fh = fh
+        self._infos: Dict[str, ZipInfo] = {}
+        self.line_counts: Dict[str, int] = {}
+    
+    def add(self, name: str, info: ZipInfo):
+        self._infos[name] = info
+    
+    def __getitem__(self, name: str) -> str:
+        info = self._infos[name]
+        try:
+            with self._zf.open(info) as fh:
+                # Bounded even if the entry's declared size was wrong
+                raw = fh.read(MAX_SINGLE_FILE_SIZE + 1)
+        except Exception as e:
+            logger.warning(f"Could not read {name}: {e}")
+            return ""
+        if len(raw) > MAX_SINGLE_FILE_SIZE:
+            logger.warning(f"Skipping {name}: too large")
+            return ""
+        # Count lines on the raw bytes (C memchr scan) before decoding
+        self.line_counts[name] = raw.count(b'\n') + 1
+        return raw.decode("utf-8", errors="ignore")
+    
+    def __contains__(self, name: object) -> bool:
+        return name in self._infos
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._infos)
+    
+    def __len__(self) -> int:
+        return len(self._infos)
+    
+    def close(self):
+        self._zf.close()
+        self._fh.close()
+
+def extract_python_files(zip_file: BinaryIO) -> Tuple[ZipSourceMap, Dict, Dict[str, int]]:
+    """Index .py sources in a seekable ZIP file object without reading them
+    
+    The returned ZipSourceMap takes ownership of zip_file and keeps it open.
+    """
     try:
-        zf = ZipFile(io.BytesIO(zip_bytes))
+        zf = ZipFile(zip_file)
     except Exception as e:
+        zip_file.close()
         raise HTTPException(400, f"Invalid ZIP: {e}")
     
-    if len(zf.namelist()) > MAX_FILES:
+    sources = ZipSourceMap(zf, zip_file)
+    try:
+        folder_structure = _index_zip(zf, sources)
+    except BaseException:
+        sources.close()
+        raise
+    return sources, folder_structure, sources.line_counts
+
+def _index_zip(zf: ZipFile, sources: ZipSourceMap) -> Dict:
+    infos = zf.infolist()
+    if len(infos) > MAX_FILES:
         raise HTTPException(400, f"Too many files (max {MAX_FILES})")
     
-    files = {}
     folder_structure = {"name": "root", "type": "folder", "children": {}, "files": []}
     skipped = 0
     skipped_dirs = set()
     
-    for name in zf.namelist():
+    # Everything is decided from ZipInfo metadata alone; entries are only
+    # decompressed when their source is actually used
+    for info in infos:
+        name = info.filename
         if name.startswith("__MACOSX") or "__pycache__" in name:
             continue
         
@@ -861,42 +1341,131 @@ def extract_python_files(zip_bytes: bytes) -> Tuple[Dict[str, str], Dict]:
                 current = current["children"][part]
         
         elif name.endswith(".py"):
+            if info.file_size > MAX_SINGLE_FILE_SIZE:
+                logger.warning(f"Skipping {name}: too large ({info.file_size} bytes)")
+                skipped += 1
+                continue
+            
+            if info.flag_bits & 0x1:
+                logger.warning(f"Skipping {name}: encrypted")
+                skipped += 1
+                continue
+            
+            # Only the head of the entry is decompressed: enough to reject
+            # unreadable entries and binaries (e.g. compiled stubs) named .py
             try:
-                content = zf.read(name).decode("utf-8", errors="ignore")
-                
-                if len(content) > MAX_SINGLE_FILE_SIZE:
-                    logger.warning(f"Skipping {name}: too large ({len(content)} bytes)")
-                    skipped += 1
-                    continue
-                
-                files[name] = content
-                
-                parts = name.split("/")
-                current = folder_structure
-                
-                for part in parts[:-1]:
-                    if part not in current["children"]:
-                        current["children"][part] = {
-                            "name": part,
-                            "type": "folder",
-                            "children": {},
-                            "files": []
-                        }
-                    current = current["children"][part]
-                
-                current["files"].append({
-                    "name": parts[-1],
-                    "path": name,
-                    "size": len(content)
-                })
-                
+                with zf.open(info) as fh:
+                    head = fh.read(BINARY_SNIFF_SIZE)
             except Exception as e:
                 logger.warning(f"Could not read {name}: {e}")
+                continue
+            if b"\0" in head:
+                logger.warning(f"Skipping {name}: binary content")
+                skipped += 1
+                continue
+            
+            sources.add(name, info)
+            
+            parts = name.split("/")
+            current = folder_structure
+            
+            for part in parts[:-1]:
+                if part not in current["children"]:
+                    current["children"][part] = {
+                        "name": part,
+                        "type": "folder",
+                        "children": {},
+                        "files": []
+                    }
+                current = current["children"][part]
+            
+            current["files"].append({
+                "name": parts[-1],
+                "path": name,
+                "size": info.file_size
+            })
     
     if skipped > 0:
         logger.info(f"📊 Skipped {skipped} files from: {', '.join(sorted(skipped_dirs))}")
     
-    return files, folder_structure
+    return folder_structure
+
+# ============================================================================
+# RESPONSE SERIALIZATION
+# ============================================================================
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def _json_default(obj: Any) -> Any:
+    if is_dataclass(obj):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps_ascii(obj: Any) -> bytes:
+    """Escape everything outside ASCII, so lone surrogates from source
+    docstrings still encode. The response streams after its status line is
+    sent, where an encoding error could only truncate the body.
+    """
+    return json.dumps(
+        obj, ensure_ascii=True, separators=(",", ":"), default=_json_default
+    ).encode("ascii")
+
+if ORJSON_AVAILABLE:
+    def _dumps(obj: Any) -> bytes:
+        # orjson encodes dataclasses natively in C; the hook covers the rest
+        try:
+            return orjson.dumps(obj, default=_json_default)
+        except TypeError as e:  # includes orjson.JSONEncodeError
+            logger.warning(f"orjson could not encode a response part ({e}); using json")
+            return _dumps_ascii(obj)
+else:
+    def _dumps(obj: Any) -> bytes:
+        # Same encoding settings as FastAPI's JSONResponse
+        try:
+            return json.dumps(
+                obj, ensure_ascii=False, separators=(",", ":"), default=_json_default
+            ).encode("utf-8")
+        except UnicodeEncodeError as e:
+            logger.warning(f"Response part is not valid UTF-8 ({e}); escaping it")
+            return _dumps_ascii(obj)
+
+def _iter_json_parts(result: Dict[str, Any]) -> Iterator[bytes]:
+    yield b"{"
+    for i, (key, value) in enumerate(result.items()):
+        yield (b"," if i else b"") + _dumps(key) + b":"
+        
+        if isinstance(value, Mapping):
+            yield b"{"
+            for j, (k, v) in enumerate(value.items()):
+                yield (b"," if j else b"") + _dumps(k) + b":" + _dumps(v)
+            yield b"}"
+        elif isinstance(value, (list, tuple)) or hasattr(value, "__next__"):
+            yield b"["
+            for j, item in enumerate(value):
+                yield (b"," if j else b"") + _dumps(item)
+            yield b"]"
+        else:
+            yield _dumps(value)
+    yield b"}"
+
+def iter_graph_json(result: Dict[str, Any], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encode an analysis result as UTF-8 JSON, yielded in chunk_size pieces
+    
+    Top-level lists, iterators and dicts are encoded one element at a time
+    and dataclasses are serialized directly, so neither a dict copy of every
+    node nor the complete JSON document is ever held in memory.
+    """
+    buffer: List[bytes] = []
+    size = 0
+    for part in _iter_json_parts(result):
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
 
 # ============================================================================
 # FASTAPI APP
@@ -905,7 +1474,9 @@ def extract_python_files(zip_bytes: bytes) -> Tuple[Dict[str, str], Dict]:
 app = FastAPI(
     title="DNAiOS Architecture Analyzer - Optimized",
     version="4.9-optimized",
-    description="4GB max upload with memory monitoring"
+    description="4GB max upload with memory monitoring",
+    # Plain dict responses (health, empty results, errors) skip the stdlib encoder too
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
 )
 
 app.add_middleware(
@@ -930,7 +1501,7 @@ async def root():
             "✅ Memory monitoring",
             "✅ Progress logging",
             "✅ Dead code detection",
-            "✅ Complexity metrics"
+            "✅ Complexity metrics (opt-in: complexity=true)"
         ],
         "configuration": {
             "max_zip_size": f"{MAX_ZIP_SIZE / 1024 / 1024 / 1024:.1f} GB",
@@ -943,25 +1514,43 @@ async def root():
         "current_memory_mb": f"{mem_mb:.1f}" if mem_mb > 0 else "unavailable"
     }
 
+def _detach_upload(upload: UploadFile) -> BinaryIO:
+    """Open an independent handle on an uploaded file
+    
+    FastAPI closes form uploads as soon as the endpoint returns, before a
+    streamed response body is sent; a duplicated descriptor keeps the
+    (already unlinked) temporary file readable until we close it ourselves.
+    """
+    fh = upload.file
+    fd = fh.fileno()  # rolls an in-memory spool over to its temporary file
+    fh.flush()
+    return os.fdopen(os.dup(fd), "rb")
+
 @app.post("/analyze")
 async def analyze(
     zipfile: UploadFile = File(None),
     pyfile: UploadFile = File(None),
-    symbol_level: bool = Form(False)
+    symbol_level: bool = Form(False),
+    complexity: bool = Form(False)
 ):
     """Analyze Python project with memory optimization"""
+    zip_sources: Optional[ZipSourceMap] = None
     try:
         logger.info("=" * 80)
         logger.info("Starting analysis...")
         log_memory_usage()
         
         files = {}
+        line_counts = {}
         folder_structure = {"name": "root", "type": "folder", "children": {}, "files": []}
         
         if pyfile and pyfile.filename.endswith('.py'):
-            content = await pyfile.read()
+            # Read at most one byte past the limit instead of the whole upload
+            content = await pyfile.read(MAX_SINGLE_FILE_SIZE + 1)
             if len(content) > MAX_SINGLE_FILE_SIZE:
                 raise HTTPException(400, f"File too large (max {MAX_SINGLE_FILE_SIZE / 1024 / 1024} MB)")
+            # Same as ZIP entries: count lines on the bytes before decoding
+            line_counts[pyfile.filename] = content.count(b'\n') + 1
             files[pyfile.filename] = content.decode("utf-8", errors="ignore")
             folder_structure["files"].append({
                 "name": pyfile.filename,
@@ -971,24 +1560,29 @@ async def analyze(
             logger.info(f"📄 Loaded single file: {pyfile.filename}")
         
         elif zipfile:
-            zip_data = await zipfile.read()
-            zip_size_mb = len(zip_data) / 1024 / 1024
-            logger.info(f"📦 ZIP file size: {zip_size_mb:.2f} MB")
+            # Starlette spools uploads to a temporary file (on disk past 1 MB)
+            # and records the size while receiving it; ZipFile seeks on that
+            # file directly so the archive is never held in memory.
+            zip_size = zipfile.size
+            if zip_size is None:
+                zipfile.file.seek(0, os.SEEK_END)
+                zip_size = zipfile.file.tell()
+            logger.info(f"📦 ZIP file size: {zip_size / 1024 / 1024:.2f} MB")
             
-            if len(zip_data) > MAX_ZIP_SIZE:
+            if zip_size > MAX_ZIP_SIZE:
                 raise HTTPException(400, f"ZIP too large (max {MAX_ZIP_SIZE / 1024 / 1024 / 1024:.1f} GB)")
             
             log_memory_usage()
-            files, folder_structure = extract_python_files(zip_data)
-            
-            del zip_data
-            gc.collect()
+            files, folder_structure, line_counts = extract_python_files(_detach_upload(zipfile))
+            zip_sources = files
             log_memory_usage()
         
         else:
             raise HTTPException(400, "Provide zipfile or pyfile")
         
         if not files:
+            if zip_sources is not None:
+                zip_sources.close()
             return {
                 "version": "4.9-optimized",
                 "nodes": [],
@@ -1001,19 +1595,30 @@ async def analyze(
         logger.info(f"📊 Processing {len(files)} Python files...")
         log_memory_usage()
         
-        builder = DependencyGraphBuilder(files, folder_structure, symbol_level)
+        builder = DependencyGraphBuilder(
+            files, folder_structure, symbol_level, line_counts, compute_complexity=complexity
+        )
         result = builder.build()
         
         logger.info(f"✅ Analysis complete!")
-        logger.info(f"📈 Results: {len(result['nodes'])} nodes, {len(result['edges'])} edges")
+        logger.info(f"📈 Results: {len(builder.nodes)} nodes, {result['metadata']['total_edges']} edges")
         log_memory_usage()
         logger.info("=" * 80)
         
-        return result
+        # file_contents is read from the ZIP while streaming; close it after
+        return StreamingResponse(
+            iter_graph_json(result),
+            media_type="application/json",
+            background=BackgroundTask(zip_sources.close) if zip_sources is not None else None
+        )
         
     except HTTPException:
+        if zip_sources is not None:
+            zip_sources.close()
         raise
     except Exception as e:
+        if zip_sources is not None:
+            zip_sources.close()
         logger.error(f"❌ Analysis failed: {e}", exc_info=True)
         raise HTTPException(500, f"Error: {e}")
     finally: